@@ -0,0 +1,209 @@
+"""
+OCR routines shared by the server and its OCR worker processes.
+
+They live in their own module so the process pool can pickle them by module name,
+which the server module (loaded from a file path by `mcp run`) doesn't have.
+"""
+import os
+import logging
+import subprocess
+import tempfile
+import threading
+from PIL import Image
+import pytesseract
+
+logger = logging.getLogger(__name__)
+
+# Prefer an in-process Tesseract API (no subprocess per image) when tesserocr is available
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Persistent tesserocr API, created lazily once per process and guarded for concurrent tool calls
+_tess_api = None
+_tess_api_lock = threading.Lock()
+
+
+def _get_tess_api() -> "tesserocr.PyTessBaseAPI":
+    """Return this process's persistent tesserocr API, loading the language model on first use."""
+    global _tess_api
+    if _tess_api is None:
+        # Honour TESSDATA_PREFIX like the tesseract binary does, instead of tesserocr's build-time default
+        tessdata_path = os.getenv("TESSDATA_PREFIX")
+        if tessdata_path:
+            _tess_api = tesserocr.PyTessBaseAPI(path=tessdata_path, lang="eng")
+        else:
+            _tess_api = tesserocr.PyTessBaseAPI(lang="eng")
+    return _tess_api
+
+
+def _image_to_text(image: Image.Image) -> str:
+    """Extract text from a PIL image, reusing a persistent Tesseract API when possible."""
+    if tesserocr is None:
+        return pytesseract.image_to_string(image)
+    with _tess_api_lock:
+        api = _get_tess_api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+# Default for the OCR tools' preprocess argument (opt-in via FAST_OCR=1 so full fidelity is the default)
+FAST_OCR = os.getenv("FAST_OCR") == "1"
+OCR_MAX_DIMENSION = 3500
+# Scans recorded above this resolution are downscaled to it when preprocessing (Tesseract works best near 300 DPI)
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI") or 300)
+
+
+def _load_image(image_path: str, preprocess: bool = FAST_OCR) -> Image.Image:
+    """Open an image for OCR, optionally converting it to grayscale and downscaling it."""
+    image = Image.open(image_path)
+    if not preprocess:
+        return image
+
+    # Cap the longest side, lowering the cap further for scans above the target DPI
+    dpi = image.info.get("dpi", (0, 0))[0]
+    original_size = max(image.size)
+    limit = OCR_MAX_DIMENSION
+    if dpi > OCR_TARGET_DPI:
+        limit = min(limit, int(original_size * OCR_TARGET_DPI / dpi))
+
+    # JPEGs can be decoded straight to grayscale at reduced scale by libjpeg
+    image.draft("L", (limit, limit))
+    image = image.convert("L")
+    if max(image.size) > limit:
+        image.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+    if dpi and max(image.size) != original_size:
+        # Keep the recorded resolution consistent with the new pixel size
+        new_dpi = dpi * max(image.size) / original_size
+        image.info["dpi"] = (new_dpi, new_dpi)
+    return image
+
+
+def _ocr_file(image_path: str, preprocess: bool = FAST_OCR) -> str:
+    """
+    Extract text from an image file.
+
+    Unless preprocessing is enabled, Tesseract reads the file itself, so the image
+    isn't decoded by PIL and re-encoded to a temporary file first.
+    """
+    if preprocess:
+        return _image_to_text(_load_image(image_path, preprocess=True))
+    if tesserocr is None:
+        try:
+            return pytesseract.image_to_string(image_path)
+        except pytesseract.TesseractError:
+            # Leptonica can't read every format PIL can; hand over decoded pixels instead
+            return _image_to_text(Image.open(image_path))
+    with _tess_api_lock:
+        api = _get_tess_api()
+        api.SetImageFile(image_path)
+        return api.GetUTF8Text()
+
+
+def _init_ocr_worker() -> None:
+    """Pool initializer: load the Tesseract model once per worker instead of per image."""
+    global _tess_api, _tess_api_lock, tesserocr
+    # Never reuse API state or a lock inherited from the server process
+    _tess_api = None
+    _tess_api_lock = threading.Lock()
+    if tesserocr is not None:
+        try:
+            _get_tess_api()
+        except Exception as e:
+            # An initializer error would break the whole pool; OCR through the tesseract binary instead
+            logger.warning("Could not load the tesserocr model (%s); falling back to pytesseract", e)
+            tesserocr = None
+
+
+def _write_text(path: str, text: str) -> None:
+    """Write text to a file as UTF-8 with a single binary write, skipping the text I/O wrapper stack."""
+    # The buffered file retries partial writes and raises if the disk fills up
+    with open(path, 'wb') as f:
+        f.write(text.encode('utf-8'))
+
+
+def _transcription_path(image_path: str, output_folder: str, suffix: str = "_transcription") -> str:
+    """Return the transcription file path for an image."""
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(output_folder, f"{stem}{suffix}.txt")
+
+
+def _ocr_one(image_path: str, output_folder: str, preprocess: bool = FAST_OCR,
+             suffix: str = "_transcription") -> tuple[str, bool, str]:
+    """
+    OCR a single image and write its transcription; runs inside a pool worker.
+
+    Returns:
+        Tuple of (output path or image path, success flag, error message)
+    """
+    try:
+        # Extract text using Tesseract
+        extracted_text = _ocr_file(image_path, preprocess)
+
+        # Save transcription to text file
+        output_path = _transcription_path(image_path, output_folder, suffix)
+        _write_text(output_path, extracted_text)
+
+        return output_path, True, ""
+
+    except Exception as e:
+        return image_path, False, str(e)
+
+
+def _tesseract_image_list(image_paths: list[str]) -> list[str] | None:
+    """
+    OCR several images with a single Tesseract process using its image-list input.
+
+    Returns:
+        Text for each image in order, or None if the run failed or its pages don't line up
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        list_path = os.path.join(tmp_dir, "images.txt")
+        _write_text(list_path, "".join(f"{os.path.abspath(path)}\n" for path in image_paths))
+        output_base = os.path.join(tmp_dir, "output")
+        try:
+            subprocess.run([pytesseract.pytesseract.tesseract_cmd, list_path, output_base],
+                           check=True, capture_output=True)
+            with open(f"{output_base}.txt", 'r', encoding='utf-8') as f:
+                pages = f.read().split("\f")
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    # Depending on the Tesseract version, the last page may or may not be followed by a form feed;
+    # multi-frame images (GIF/TIFF) produce extra pages and can't be mapped back
+    if pages and not pages[-1]:
+        pages.pop()
+    if len(pages) != len(image_paths):
+        logger.warning("Tesseract returned %d pages for %d images; falling back to per-image OCR",
+                       len(pages), len(image_paths))
+        return None
+    return [page + "\f" for page in pages]
+
+
+def _ocr_batch(image_paths: list[str], output_folder: str, preprocess: bool = FAST_OCR,
+               suffix: str = "_transcription", image_list: bool = True) -> list[tuple[str, bool, str]]:
+    """
+    OCR a chunk of images and write their transcriptions; runs inside a pool worker.
+
+    When image_list is set and images go to the tesseract binary unmodified, the whole
+    chunk shares one Tesseract process. Otherwise, or if that run fails, each image is
+    OCRed on its own.
+
+    Returns:
+        List of (output path or image path, success flag, error message) tuples
+    """
+    if image_list and tesserocr is None and not preprocess and len(image_paths) > 1:
+        pages = _tesseract_image_list(image_paths)
+        if pages is not None:
+            results = []
+            for image_path, extracted_text in zip(image_paths, pages):
+                output_path = _transcription_path(image_path, output_folder, suffix)
+                try:
+                    _write_text(output_path, extracted_text)
+                    results.append((output_path, True, ""))
+                except OSError as e:
+                    results.append((image_path, False, str(e)))
+            return results
+
+    return [_ocr_one(image_path, output_folder, preprocess, suffix) for image_path in image_paths]
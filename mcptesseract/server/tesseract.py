@@ -1,11 +1,19 @@
 import os
-import glob
+import asyncio
 import sqlite3
 import re
 import base64
+import functools
+import hashlib
+import logging
+import multiprocessing
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from PIL import Image
-import pytesseract
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 
@@ -15,6 +23,9 @@ load_dotenv()
 # Create MCP instance
 mcp = FastMCP("OCR-mLLM Benchmarking Server")
 
+# Diagnostics go to stderr via logging; stdout carries the MCP stdio protocol
+logger = logging.getLogger(__name__)
+
 # Initialize LLM clients (with error handling for missing API keys)
 openai_client = None
 anthropic_client = None
@@ -22,42 +33,207 @@ gemini_client = None
 
 try:
     if os.getenv("OPENAI_API_KEY"):
-        from openai import OpenAI
-        openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        from openai import AsyncOpenAI
+        openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 except ImportError:
-    print("OpenAI library not installed. Install with: pip install openai")
+    logger.warning("OpenAI library not installed. Install with: pip install openai")
 
 try:
     if os.getenv("ANTHROPIC_API_KEY"):
         from anthropic import Anthropic
         anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 except ImportError:
-    print("Anthropic library not installed. Install with: pip install anthropic")
+    logger.warning("Anthropic library not installed. Install with: pip install anthropic")
 
 try:
     if os.getenv("GOOGLE_API_KEY"):
         from google import genai
+        from google.genai import types as genai_types
         gemini_client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
 except ImportError:
-    print("Google GenAI library not installed. Install with: pip install google-genai")
+    logger.warning("Google GenAI library not installed. Install with: pip install google-genai")
 
+# OCR routines the worker pool runs live in a sibling module that workers can import by name
+# (`mcp run` puts this folder on sys.path but loads this file under a throwaway module name)
+from ocr_worker import FAST_OCR, _init_ocr_worker, _ocr_batch, _ocr_file, _transcription_path, _write_text
 
-# ====================
-# ORIGINAL OCR TOOLS
-# ====================
+# Prompts used by process_with_llm (static, so built once at import time). Each prompt is sent
+# as the text part of a single user message alongside the image, as the benchmark has always done.
+OCR_CORRECTION_PROMPT = """
+You are a text correction assistant. Your task is to clean up and correct errors from raw OCR output.
+The text may contain misrecognized characters, broken words, or incorrect formatting.
+Carefully read the provided OCR output and produce a corrected version that is grammatically accurate 
+and as faithful to the original content as possible. Because this is a historical document, try to 
+preserve archaic spelling or formatting where clearly intended. Only correct obvious OCR errors.
+Put the dates associated with each entry at the end of the line.
 
-@mcp.tool()
-def ocr_image_to_text(image_path: str, output_folder: str = "transcriptions") -> str:
+Input (Raw OCR Text):
+{input}
+"""
+
+LLM_TRANSCRIPTION_PROMPT = """
+You are an expert historian. Your task is to transcribe the provided image into text. The image
+is a 20th century bibliographic entry. Because this is a historical document, try to preserve 
+archaic spelling or formatting where clearly intended. Put the indices associated with each entry at the end of the line.
+Return the text only, nothing else.
+"""
+
+# Maximum number of in-flight LLM requests per process_with_llm call (per model in run_full_pipeline)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY") or 20)
+
+# Retry policy for transient LLM failures (rate limits, overloaded servers, dropped connections)
+LLM_MAX_ATTEMPTS = 3
+LLM_RETRY_MIN_DELAY = 1.0
+LLM_RETRY_MAX_DELAY = 30.0
+
+# Default cap on LLM requests started per second, to stay under provider rate limits
+LLM_DEFAULT_RPS = 5.0
+
+
+# Persistent cache of LLM responses, keyed by model, prompt and image content (TTL in seconds, 0 = never expire)
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.db")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL") or 0)
+
+# Images up to this size are sent to Gemini inline; larger ones go through the Files API
+GEMINI_INLINE_LIMIT = 19 * 1024 * 1024
+# Gemini deletes uploaded files after 48 hours; reupload a little before that
+GEMINI_UPLOAD_TTL = 47 * 3600
+
+# Number of images whose bytes/base64 payloads are kept in memory for reuse across LLM passes
+IMAGE_PAYLOAD_CACHE_SIZE = 64
+
+# Supported image extensions (lowercase, without the dot)
+IMAGE_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'bmp', 'tiff', 'gif'})
+
+# Shared OCR worker pool (created lazily on first batch so repeated calls reuse workers)
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY") or os.cpu_count() or 1)
+# Images per Tesseract invocation when batching through its image-list input
+OCR_BATCH_SIZE = 50
+_ocr_executor = None
+# Guards creating and discarding the pool, which concurrent tool threads can race on
+_ocr_executor_lock = threading.Lock()
+# Caps single-image OCR calls running at once in the server process (batches are bounded by the pool)
+_ocr_call_semaphore = asyncio.Semaphore(OCR_CONCURRENCY)
+
+
+def _get_ocr_executor() -> ProcessPoolExecutor:
+    """Return the module-level OCR process pool, creating it on first use."""
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is None:
+            # One single-threaded Tesseract per worker, so workers don't compete for cores
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+            # Workers are started on demand from tool threads; forking then could copy _tess_api_lock while
+            # another thread holds it, so start them from a clean forkserver process instead
+            _ocr_executor = ProcessPoolExecutor(max_workers=OCR_CONCURRENCY, initializer=_init_ocr_worker,
+                                                mp_context=multiprocessing.get_context("forkserver"))
+        return _ocr_executor
+
+
+def _discard_ocr_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken OCR pool so the next batch starts a fresh one."""
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is executor:
+            _ocr_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _is_up_to_date(image_path: str, output_path: str) -> bool:
+    """Check whether a non-empty output file exists that is at least as new as its image."""
+    try:
+        output_stat = os.stat(output_path)
+        return output_stat.st_size > 0 and output_stat.st_mtime >= os.stat(image_path).st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def _ocr_files_in_pool(image_files: list[str], output_folder: str, preprocess: bool = FAST_OCR,
+                       suffix: str = "_transcription", image_list: bool = True) -> tuple[list[str], list[str]]:
     """
-    Perform OCR on an image file and save the transcription to a text file.
-    
-    Args:
-        image_path: Path to the image file to process
-        output_folder: Folder where transcription text files will be saved
-    
+    OCR images in parallel across the shared worker pool, writing one text file per image.
+
     Returns:
-        Success message with paths of processed files
+        Tuple of (written output paths, "path: error" messages for failed images)
+    """
+    processed_files = []
+    failed_files = []
+
+    executor = _get_ocr_executor()
+    chunk_size = max(1, min(OCR_BATCH_SIZE, -(-len(image_files) // OCR_CONCURRENCY)))
+    chunks = [image_files[i:i + chunk_size] for i in range(0, len(image_files), chunk_size)]
+    try:
+        futures = [executor.submit(_ocr_batch, chunk, output_folder, preprocess, suffix, image_list)
+                   for chunk in chunks]
+        for future in as_completed(futures):
+            for path, ok, err in future.result():
+                if ok:
+                    processed_files.append(path)
+                else:
+                    failed_files.append(f"{path}: {err}")
+    except BrokenProcessPool:
+        # A worker died; don't leave the pool unusable for every later call
+        _discard_ocr_executor(executor)
+        raise
+
+    return processed_files, failed_files
+
+
+# Word tokenizer shared by the word frequency tools
+_WORD_RE = re.compile(r'\w+')
+
+# SQLite connections cached per thread (connections can't cross threads), keyed by database path
+_db_connections = threading.local()
+
+
+class _Connection(sqlite3.Connection):
+    """SQLite connection that remembers which tables it has already created."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ready_tables = set()
+
+
+def _connect_db(db_path: str) -> sqlite3.Connection:
     """
+    Return this thread's SQLite connection for db_path, opening it on first use.
+
+    Connections are in autocommit mode (transactions are explicit) and tuned for
+    write-heavy workloads. A cached connection is reopened if its file was removed.
+    """
+    connections = getattr(_db_connections, "by_path", None)
+    if connections is None:
+        connections = _db_connections.by_path = {}
+
+    key = os.path.abspath(db_path)
+    conn = connections.get(key)
+    if conn is not None and not os.path.exists(key):
+        conn.close()
+        conn = None
+    if conn is None:
+        conn = sqlite3.connect(db_path, isolation_level=None, factory=_Connection)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        connections[key] = conn
+    return conn
+
+
+def _create_word_freq_table(cursor: sqlite3.Cursor) -> None:
+    """Create the word_freq table if needed, with a covering index on count for top-N queries."""
+    cursor.execute("CREATE TABLE IF NOT EXISTS word_freq (word TEXT PRIMARY KEY, count INTEGER)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_word_freq_count ON word_freq (count DESC, word)")
+
+
+# ====================
+# ORIGINAL OCR TOOLS
+# ====================
+
+def _ocr_image_to_text(image_path: str, output_folder: str = "transcriptions", force: bool = False,
+                       preprocess: bool = FAST_OCR) -> str:
+    """OCR one image and save its transcription (blocking; see ocr_image_to_text)."""
     try:
         # Validate image file exists
         if not os.path.exists(image_path):
@@ -66,20 +242,18 @@ def ocr_image_to_text(image_path: str, output_folder: str = "transcriptions") ->
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
         
-        # Load and process the image
-        image = Image.open(image_path)
+        # Generate output filename based on input image name
+        output_path = _transcription_path(image_path, output_folder)
         
-        # Extract text using pytesseract
-        extracted_text = pytesseract.image_to_string(image)
+        # Skip OCR if the transcription is already newer than the image
+        if not force and _is_up_to_date(image_path, output_path):
+            return f"Skipped {image_path}. Up-to-date transcription already at {output_path}"
         
-        # Generate output filename based on input image name
-        image_name = Path(image_path).stem
-        output_filename = f"{image_name}_transcription.txt"
-        output_path = os.path.join(output_folder, output_filename)
+        # Extract text using Tesseract
+        extracted_text = _ocr_file(image_path, preprocess)
         
         # Save transcription to text file
-        with open(output_path, 'w', encoding='utf-8') as text_file:
-            text_file.write(extracted_text)
+        _write_text(output_path, extracted_text)
         
         return f"Successfully processed {image_path}. Transcription saved to {output_path}"
         
@@ -87,17 +261,28 @@ def ocr_image_to_text(image_path: str, output_folder: str = "transcriptions") ->
         return f"Error processing {image_path}: {str(e)}"
 
 @mcp.tool()
-def batch_ocr_folder(image_folder: str, output_folder: str = "transcriptions") -> str:
+async def ocr_image_to_text(image_path: str, output_folder: str = "transcriptions", force: bool = False,
+                            preprocess: bool = FAST_OCR) -> str:
     """
-    Process all images in a folder and save transcriptions to text files.
+    Perform OCR on an image file and save the transcription to a text file.
     
     Args:
-        image_folder: Path to folder containing images to process
+        image_path: Path to the image file to process
         output_folder: Folder where transcription text files will be saved
+        force: Re-run OCR even if an up-to-date transcription already exists
+        preprocess: Convert to grayscale and downscale oversized or above-OCR_TARGET_DPI images
+            before OCR (faster; disable for already-optimized scans)
     
     Returns:
-        Summary of batch processing results
+        Success message with paths of processed files
     """
+    # Run in a worker thread so the event loop keeps serving other tool calls
+    async with _ocr_call_semaphore:
+        return await asyncio.to_thread(_ocr_image_to_text, image_path, output_folder, force, preprocess)
+
+def _batch_ocr_folder(image_folder: str, output_folder: str = "transcriptions", force: bool = False,
+                      preprocess: bool = FAST_OCR) -> str:
+    """OCR every image in a folder across the worker pool (blocking; see batch_ocr_folder)."""
     try:
         # Validate input folder exists
         if not os.path.exists(image_folder):
@@ -106,42 +291,36 @@ def batch_ocr_folder(image_folder: str, output_folder: str = "transcriptions") -
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
         
-        # Supported image extensions
-        image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.gif']
+        # Collect all images in the folder in a single directory pass (skipping hidden files such as
+        # macOS "._" metadata, which glob never matched)
+        with os.scandir(image_folder) as entries:
+            image_files = [
+                entry.path for entry in entries
+                if not entry.name.startswith('.') and entry.is_file()
+                and entry.name.rpartition('.')[2].lower() in IMAGE_EXTENSIONS
+            ]
         
-        processed_files = []
-        failed_files = []
+        skipped_files = []
         
-        # Process all images in the folder
-        for extension in image_extensions:
-            image_files = glob.glob(os.path.join(image_folder, extension))
-            image_files.extend(glob.glob(os.path.join(image_folder, extension.upper())))
-            
+        # Leave out images whose transcription is already newer than the image
+        if not force:
+            pending_files = []
             for image_path in image_files:
-                try:
-                    # Load and process the image
-                    image = Image.open(image_path)
-                    
-                    # Extract text using pytesseract
-                    extracted_text = pytesseract.image_to_string(image)
-                    
-                    # Generate output filename
-                    image_name = Path(image_path).stem
-                    output_filename = f"{image_name}_transcription.txt"
-                    output_path = os.path.join(output_folder, output_filename)
-                    
-                    # Save transcription to text file
-                    with open(output_path, 'w', encoding='utf-8') as text_file:
-                        text_file.write(extracted_text)
-                    
-                    processed_files.append(output_path)
-                    
-                except Exception as e:
-                    failed_files.append(f"{image_path}: {str(e)}")
+                output_path = _transcription_path(image_path, output_folder)
+                if _is_up_to_date(image_path, output_path):
+                    skipped_files.append(output_path)
+                else:
+                    pending_files.append(image_path)
+            image_files = pending_files
+        
+        # OCR images in parallel across worker processes
+        processed_files, failed_files = _ocr_files_in_pool(image_files, output_folder, preprocess)
         
         # Generate summary report
         summary = f"Batch OCR completed!\n"
         summary += f"Successfully processed: {len(processed_files)} files\n"
+        if skipped_files:
+            summary += f"Skipped (already up to date): {len(skipped_files)} files\n"
         if failed_files:
             summary += f"Failed to process: {len(failed_files)} files\n"
             summary += "Failed files:\n" + "\n".join(failed_files)
@@ -151,6 +330,25 @@ def batch_ocr_folder(image_folder: str, output_folder: str = "transcriptions") -
     except Exception as e:
         return f"Error during batch processing: {str(e)}"
 
+@mcp.tool()
+async def batch_ocr_folder(image_folder: str, output_folder: str = "transcriptions", force: bool = False,
+                           preprocess: bool = FAST_OCR) -> str:
+    """
+    Process all images in a folder and save transcriptions to text files.
+    
+    Args:
+        image_folder: Path to folder containing images to process
+        output_folder: Folder where transcription text files will be saved
+        force: Re-run OCR even for images with an up-to-date transcription
+        preprocess: Convert to grayscale and downscale oversized or above-OCR_TARGET_DPI images
+            before OCR (faster; disable for already-optimized scans)
+    
+    Returns:
+        Summary of batch processing results
+    """
+    # Run in a worker thread so the event loop keeps serving other tool calls
+    return await asyncio.to_thread(_batch_ocr_folder, image_folder, output_folder, force, preprocess)
+
 @mcp.tool()
 def store_word_frequencies(txt_file_path: str, db_path: str = "word_freq.db") -> str:
     """
@@ -166,33 +364,38 @@ def store_word_frequencies(txt_file_path: str, db_path: str = "word_freq.db") ->
     if not os.path.exists(txt_file_path):
         return f"Error: file not found at {txt_file_path}"
 
-    # Read the transcription file
+    # Stream the transcription file line by line, counting words as they are tokenized
+    word_counts = Counter()
     with open(txt_file_path, 'r', encoding='utf-8') as f:
-        text = f.read().lower()
-
-    # Tokenize the text into words
-    words = re.findall(r'\w+', text)
+        for line in f:
+            word_counts.update(match.group() for match in _WORD_RE.finditer(line.lower()))
+    total_words = word_counts.total()
 
     # Connect to the SQLite database
-    conn = sqlite3.connect(db_path)
+    conn = _connect_db(db_path)
     cursor = conn.cursor()
 
-    # Create table if it doesn't exist
-    cursor.execute("CREATE TABLE IF NOT EXISTS word_freq (word TEXT PRIMARY KEY, count INTEGER)")
+    # Create table if it doesn't exist (once per connection)
+    if "word_freq" not in conn.ready_tables:
+        _create_word_freq_table(cursor)
+        conn.ready_tables.add("word_freq")
 
-    # Insert or update word frequencies
-    for word in words:
-        cursor.execute("""
+    # Insert or update each distinct word once, all in a single transaction
+    cursor.execute("BEGIN")
+    try:
+        cursor.executemany("""
             INSERT INTO word_freq (word, count)
-            VALUES (?, 1)
-            ON CONFLICT(word) DO UPDATE SET count = count + 1
-        """, (word,))
+            VALUES (?, ?)
+            ON CONFLICT(word) DO UPDATE SET count = count + excluded.count
+        """, word_counts.items())
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK")
+        raise
 
-    # Commit changes and close the connection
-    conn.commit()
-    conn.close()
+    # Commit changes
+    cursor.execute("COMMIT")
 
-    return f"Stored {len(words)} words from {txt_file_path} into {db_path}"
+    return f"Stored {total_words} words from {txt_file_path} into {db_path}"
 
 @mcp.tool()
 def query_word_frequency(word: str, db_path: str = "word_freq.db") -> str:
@@ -207,16 +410,13 @@ def query_word_frequency(word: str, db_path: str = "word_freq.db") -> str:
         A message with the word count, or a not-found message
     """
     # Connect to the SQLite database
-    conn = sqlite3.connect(db_path)
+    conn = _connect_db(db_path)
     cursor = conn.cursor()
 
     # Query the frequency of the word
     cursor.execute("SELECT count FROM word_freq WHERE word = ?", (word.lower(),))
     row = cursor.fetchone()
 
-    # Close the connection
-    conn.close()
-
     if row:
         return f"'{word}' appears {row[0]} time(s)."
     else:
@@ -237,31 +437,28 @@ def get_all_word_frequencies(db_path: str = "word_freq.db", limit: int = 20) ->
     if not os.path.exists(db_path):
         return f"Error: Database file not found at {db_path}"
 
-    conn = sqlite3.connect(db_path)
+    conn = _connect_db(db_path)
     cursor = conn.cursor()
 
     cursor.execute("SELECT word, count FROM word_freq ORDER BY count DESC LIMIT ?", (limit,))
     rows = cursor.fetchall()
 
-    conn.close()
-
     if not rows:
         return "The database is empty."
 
-    result = "Word Frequencies:\n"
-    result += "-"*20 + "\n"
-    for word, count in rows:
-        result += f"{word}: {count}\n"
+    lines = ["Word Frequencies:", "-"*20]
+    lines.extend(f"{word}: {count}" for word, count in rows)
     
-    return result
+    return "\n".join(lines) + "\n"
 
 @mcp.tool()
-def clear_word_frequencies(db_path: str = "word_freq.db") -> str:
+def clear_word_frequencies(db_path: str = "word_freq.db", vacuum: bool = False) -> str:
     """
     Deletes all word frequencies from the SQLite database.
     
     Args:
         db_path: Path to the SQLite database file (default: "word_freq.db")
+        vacuum: Also rewrite the database file to reclaim disk space (default: False)
     
     Returns:
         A success or error message.
@@ -270,21 +467,27 @@ def clear_word_frequencies(db_path: str = "word_freq.db") -> str:
         return f"Error: Database file not found at {db_path}"
 
     try:
-        conn = sqlite3.connect(db_path)
+        conn = _connect_db(db_path)
         cursor = conn.cursor()
         
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='word_freq'")
         if cursor.fetchone() is None:
-            conn.close()
             return f"Table 'word_freq' does not exist in {db_path}. Nothing to delete."
 
-        cursor.execute("DELETE FROM word_freq")
-        conn.commit()
+        # Dropping and recreating the table frees its pages without touching every row
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute("DROP TABLE word_freq")
+            _create_word_freq_table(cursor)
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
         
-        # Vacuum the database to reclaim space
-        conn.execute("VACUUM")
+        # Vacuum the database to reclaim space only when asked, as it rewrites the whole file
+        if vacuum:
+            conn.execute("VACUUM")
         
-        conn.close()
         return f"Successfully deleted all word frequencies from {db_path}."
     except sqlite3.Error as e:
         return f"Database error: {e}"
@@ -296,6 +499,46 @@ def clear_word_frequencies(db_path: str = "word_freq.db") -> str:
 # PIPELINE TOOLS
 # ====================
 
+def _list_png_files(folder: Path) -> list[str]:
+    """Return the sorted paths of the non-hidden PNG files in a folder, in a single directory scan."""
+    with os.scandir(folder) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.name.endswith(".png") and not entry.name.startswith('.') and entry.is_file())
+
+def _text_stats(file_path: Path, preview_chars: int = 100, chunk_chars: int = 1 << 20) -> tuple[str, int, int]:
+    """Return a text file's preview, word count and character count, reading it in bounded chunks."""
+    preview = ""
+    word_count = char_count = 0
+    in_word = False
+    with open(file_path, 'r', encoding='utf-8') as f:
+        while chunk := f.read(chunk_chars):
+            char_count += len(chunk)
+            if len(preview) < preview_chars:
+                preview += chunk[:preview_chars - len(preview)]
+            word_count += len(chunk.split())
+            # A word split across two chunks was counted twice
+            if in_word and not chunk[0].isspace():
+                word_count -= 1
+            in_word = not chunk[-1].isspace()
+    return preview, word_count, char_count
+
+def _pipeline_root(source_dir: Path) -> Path:
+    """Return the pipeline root for an image folder (two levels up from data/pngs, else its parent)."""
+    if "data/pngs" in str(source_dir):
+        return source_dir.parent.parent
+    return source_dir.parent
+
+# Results subdirectory for each LLM mode, keyed by use_ocr
+_LLM_RESULT_DIRS = {True: "ocr-llm-img2txt", False: "llm-img2txt"}
+
+def _count_files(folder: Path, extension: str) -> int | None:
+    """Count the non-hidden files with the given extension in a folder, or return None if the folder is missing."""
+    try:
+        with os.scandir(folder) as entries:
+            return sum(1 for entry in entries if entry.name.endswith(extension) and not entry.name.startswith('.'))
+    except FileNotFoundError:
+        return None
+
 @mcp.tool()
 def setup_directories(base_dir: str = ".") -> str:
     """
@@ -332,58 +575,41 @@ def setup_directories(base_dir: str = ".") -> str:
     except Exception as e:
         return f"Error setting up directories: {str(e)}"
 
-@mcp.tool()
-def run_tesseract_pipeline(image_folder: str, output_folder: str | None = None) -> str:
-    """
-    Run Tesseract OCR on all PNG images in a folder for the pipeline.
-    
-    Args:
-        image_folder: Path to folder containing PNG images
-        output_folder: Path to save OCR results (optional, defaults to results/ocr-img2txt)
-        
-    Returns:
-        Summary of OCR processing results
-    """
+def _run_tesseract_pipeline(image_folder: str, output_folder: str | None = None, batch: bool = True,
+                            png_files: list[str] | None = None, force: bool = False) -> str:
+    """OCR a folder of PNGs into the pipeline layout (blocking; see run_tesseract_pipeline)."""
     try:
         source_dir = Path(image_folder)
         if not source_dir.exists():
             return f"Error: Image folder not found at {image_folder}"
         
-        if output_folder:
-            output_dir = Path(output_folder)
-        else:
-            # Default to pipeline structure
-            if "data/pngs" in str(source_dir):
-                base_dir = source_dir.parent.parent
-                output_dir = base_dir / "results" / "ocr-img2txt"
-            else:
-                output_dir = source_dir.parent / "results" / "ocr-img2txt"
+        # Default to pipeline structure
+        output_dir = Path(output_folder) if output_folder else _pipeline_root(source_dir) / "results" / "ocr-img2txt"
         
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Process all PNG files
-        png_files = list(source_dir.glob("*.png"))
-        processed_files = []
-        failed_files = []
+        # Process all PNG files in parallel (no _transcription suffix for pipeline)
+        if png_files is None:
+            png_files = _list_png_files(source_dir)
+        
+        # Leave out images whose OCR result is already newer than the image
+        skipped_files = []
+        if not force:
+            pending_files = []
+            for png_file in png_files:
+                output_path = _transcription_path(png_file, str(output_dir), suffix="")
+                if _is_up_to_date(png_file, output_path):
+                    skipped_files.append(output_path)
+                else:
+                    pending_files.append(png_file)
+            png_files = pending_files
         
-        for png_file in png_files:
-            try:
-                # Extract text using Tesseract
-                image = Image.open(png_file)
-                extracted_text = pytesseract.image_to_string(image)
-                
-                # Save result (no _transcription suffix for pipeline)
-                output_file = output_dir / f"{png_file.stem}.txt"
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(extracted_text)
-                
-                processed_files.append(str(output_file))
-                
-            except Exception as e:
-                failed_files.append(f"{png_file}: {str(e)}")
+        processed_files, failed_files = _ocr_files_in_pool(png_files, str(output_dir), suffix="", image_list=batch)
         
         summary = f"Pipeline OCR processing completed!\n"
         summary += f"Successfully processed: {len(processed_files)} files\n"
+        if skipped_files:
+            summary += f"Skipped (already up to date): {len(skipped_files)} files\n"
         summary += f"Output directory: {output_dir}\n"
         if failed_files:
             summary += f"Failed to process: {len(failed_files)} files\n"
@@ -395,7 +621,153 @@ def run_tesseract_pipeline(image_folder: str, output_folder: str | None = None)
         return f"Error during pipeline OCR processing: {str(e)}"
 
 @mcp.tool()
-def process_with_llm(image_folder: str, model_name: str, use_ocr: bool = False) -> str:
+async def run_tesseract_pipeline(image_folder: str, output_folder: str | None = None, batch: bool = True,
+                                 png_files: list[str] | None = None, force: bool = False) -> str:
+    """
+    Run Tesseract OCR on all PNG images in a folder for the pipeline.
+    
+    Args:
+        image_folder: Path to folder containing PNG images
+        output_folder: Path to save OCR results (optional, defaults to results/ocr-img2txt)
+        batch: Feed chunks of images to one Tesseract process via an image list file,
+            instead of starting Tesseract once per image (default: True)
+        png_files: PNG paths to process, if already listed (optional, defaults to scanning image_folder)
+        force: Re-run OCR even for images with an up-to-date result
+        
+    Returns:
+        Summary of OCR processing results
+    """
+    # Run in a worker thread so the event loop keeps serving other tool calls
+    return await asyncio.to_thread(_run_tesseract_pipeline, image_folder, output_folder, batch, png_files, force)
+
+def _llm_cache_key(model_name: str, prompt: str, image_path: str) -> str:
+    """Return the content hash identifying an LLM request, streaming the image instead of loading it."""
+    digest = hashlib.sha256()
+    for part in (model_name, prompt):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    with open(image_path, 'rb') as f:
+        return hashlib.file_digest(f, lambda: digest).hexdigest()
+
+def _llm_cache_db() -> sqlite3.Connection:
+    """Return the connection to the LLM response cache, creating its table if needed."""
+    conn = _connect_db(LLM_CACHE_DB)
+    if "llm_cache" not in conn.ready_tables:
+        conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT, created REAL)")
+        conn.ready_tables.add("llm_cache")
+    return conn
+
+def _get_cached_response(key: str) -> str | None:
+    """Look up a cached LLM response, ignoring entries older than LLM_CACHE_TTL."""
+    row = _llm_cache_db().execute("SELECT response, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+    if row is None or (LLM_CACHE_TTL and time.time() - row[1] > LLM_CACHE_TTL):
+        return None
+    return row[0]
+
+def _store_cached_response(key: str, response: str) -> None:
+    """Save an LLM response to the cache."""
+    _llm_cache_db().execute("INSERT OR REPLACE INTO llm_cache (key, response, created) VALUES (?, ?, ?)",
+                            (key, response, time.time()))
+
+@functools.lru_cache(maxsize=IMAGE_PAYLOAD_CACHE_SIZE)
+def _read_image_bytes(image_path: str, mtime_ns: int) -> bytes:
+    """Read an image file, cached per path and modification time so pipeline passes share one read."""
+    with open(image_path, 'rb') as f:
+        return f.read()
+
+@functools.lru_cache(maxsize=IMAGE_PAYLOAD_CACHE_SIZE)
+def _image_base64(image_path: str, mtime_ns: int) -> str:
+    """Base64-encode an image once per path and modification time."""
+    return base64.b64encode(_read_image_bytes(image_path, mtime_ns)).decode('utf-8')
+
+# Gemini file handles and upload times for large images by (path, modification time),
+# so each is uploaded once per GEMINI_UPLOAD_TTL
+_gemini_uploads = {}
+
+async def _call_llm(model_name: str, prompt: str, png_file: Path, mtime_ns: int) -> str:
+    """Send the prompt and image to the given model and return its response."""
+    if model_name == "gpt-4o":
+        # Encode image
+        base64_image = await asyncio.to_thread(_image_base64, str(png_file), mtime_ns)
+        
+        response = await openai_client.chat.completions.create(
+            model='gpt-4o',
+            messages=[{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64_image}"}}
+                ]
+            }]
+        )
+        return response.choices[0].message.content or ""
+    
+    # Send small images inline, saving the upload round-trip
+    image_bytes = await asyncio.to_thread(_read_image_bytes, str(png_file), mtime_ns)
+    if len(image_bytes) <= GEMINI_INLINE_LIMIT:
+        image_part = genai_types.Part.from_bytes(data=image_bytes, mime_type="image/png")
+    else:
+        upload_key = (str(png_file), mtime_ns)
+        image_part, uploaded_at = _gemini_uploads.get(upload_key, (None, 0.0))
+        if image_part is None or time.monotonic() - uploaded_at > GEMINI_UPLOAD_TTL:
+            image_part = await gemini_client.aio.files.upload(file=str(png_file))
+            if not image_part:
+                raise RuntimeError("Failed to upload to Gemini")
+            _gemini_uploads[upload_key] = (image_part, time.monotonic())
+    
+    response = await gemini_client.aio.models.generate_content(
+        model='gemini-2.5-flash',
+        contents=[prompt, image_part]
+    )
+    return response.text or ""
+
+class _RateLimiter:
+    """Space out async calls so that at most `rps` of them start per second (unlimited if rps <= 0)."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self.next_start = 0.0
+
+    async def wait(self) -> None:
+        """Wait until the next start slot, reserving it for the caller."""
+        if not self.interval:
+            return
+        # No await between reading and reserving the slot, so no lock is needed
+        now = time.monotonic()
+        delay = self.next_start - now
+        self.next_start = max(now, self.next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def _is_transient_llm_error(error: Exception) -> bool:
+    """Check whether an LLM API error is worth retrying (HTTP 429/5xx or a rate-limit/connection failure)."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ("rate limit", "quota", "timed out", "timeout", "connection"))
+
+async def _call_llm_with_retries(model_name: str, prompt: str, png_file: Path, mtime_ns: int,
+                                 semaphore: asyncio.Semaphore, limiter: _RateLimiter) -> str:
+    """Call the LLM under the concurrency and rate limits, retrying transient failures with exponential backoff."""
+    delay = LLM_RETRY_MIN_DELAY
+    for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+        try:
+            async with semaphore:
+                await limiter.wait()
+                return await _call_llm(model_name, prompt, png_file, mtime_ns)
+        except Exception as e:
+            if attempt == LLM_MAX_ATTEMPTS or not _is_transient_llm_error(e):
+                raise
+        
+        # Back off outside the semaphore so a waiting retry doesn't hold a request slot
+        await asyncio.sleep(random.uniform(delay / 2, delay))
+        delay = min(delay * 2, LLM_RETRY_MAX_DELAY)
+
+@mcp.tool()
+async def process_with_llm(image_folder: str, model_name: str, use_ocr: bool = False,
+                           rps: float = LLM_DEFAULT_RPS, use_cache: bool = True,
+                           png_files: list[str] | None = None, force: bool = False) -> str:
     """
     Process images using LLM (GPT-4o or Gemini) with optional OCR input.
     
@@ -403,10 +775,21 @@ def process_with_llm(image_folder: str, model_name: str, use_ocr: bool = False)
         image_folder: Path to folder containing images
         model_name: Model to use ('gpt-4o' or 'gemini-2.5-flash')
         use_ocr: Whether to include OCR text in the prompt
+        rps: Maximum requests started per second for this call (0 for no limit)
+        use_cache: Reuse saved responses for identical model/prompt/image requests
+        png_files: PNG paths to process, if already listed (optional, defaults to scanning image_folder)
+        force: Re-run the LLM even for images with an up-to-date result, bypassing the response cache
         
     Returns:
         Summary of LLM processing results
     """
+    return await _process_with_llm(image_folder, model_name, use_ocr, use_cache, png_files, force,
+                                   asyncio.Semaphore(LLM_CONCURRENCY), _RateLimiter(rps))
+
+async def _process_with_llm(image_folder: str, model_name: str, use_ocr: bool, use_cache: bool,
+                            png_files: list[str] | None, force: bool,
+                            semaphore: asyncio.Semaphore, limiter: _RateLimiter) -> str:
+    """Run process_with_llm under the given request slots and rate limiter, which callers may share."""
     try:
         source_dir = Path(image_folder)
         if not source_dir.exists():
@@ -421,103 +804,71 @@ def process_with_llm(image_folder: str, model_name: str, use_ocr: bool = False)
             return f"Error: Unsupported model {model_name}. Supported: gpt-4o, gemini-2.5-flash"
         
         # Set up output directory
-        if "data/pngs" in str(source_dir):
-            base_dir = source_dir.parent.parent
-        else:
-            base_dir = source_dir.parent
-            
-        if use_ocr:
-            output_dir = base_dir / "results" / "ocr-llm-img2txt" / model_name
-        else:
-            output_dir = base_dir / "results" / "llm-img2txt" / model_name
-        
+        base_dir = _pipeline_root(source_dir)
+        output_dir = base_dir / "results" / _LLM_RESULT_DIRS[use_ocr] / model_name
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Define prompts
-        prompt_template_ocr_llm = """
-You are a text correction assistant. Your task is to clean up and correct errors from raw OCR output.
-The text may contain misrecognized characters, broken words, or incorrect formatting.
-Carefully read the provided OCR output and produce a corrected version that is grammatically accurate 
-and as faithful to the original content as possible. Because this is a historical document, try to 
-preserve archaic spelling or formatting where clearly intended. Only correct obvious OCR errors.
-Put the dates associated with each entry at the end of the line.
-
-Input (Raw OCR Text):
-{input}
-"""
-        
-        prompt_llm = """
-You are an expert historian. Your task is to transcribe the provided image into text. The image
-is a 20th century bibliographic entry. Because this is a historical document, try to preserve 
-archaic spelling or formatting where clearly intended. Put the indices associated with each entry at the end of the line.
-Return the text only, nothing else.
-"""
-        
-        # Process images
-        png_files = list(source_dir.glob("*.png"))
+        # Process images concurrently, keeping at most LLM_CONCURRENCY requests in flight per semaphore
+        png_files = [Path(png_file) for png_file in
+                     (png_files if png_files is not None else _list_png_files(source_dir))]
         processed_files = []
         failed_files = []
+        cached_files = []
+        skipped_files = []
         
-        for png_file in png_files:
-            try:
-                # Prepare prompt
-                if use_ocr:
-                    # Read OCR output
-                    ocr_file = base_dir / "results" / "ocr-img2txt" / f"{png_file.stem}.txt"
-                    if ocr_file.exists():
-                        with open(ocr_file, 'r', encoding='utf-8') as f:
-                            ocr_text = f.read()
-                        prompt = prompt_template_ocr_llm.format(input=ocr_text)
-                    else:
-                        failed_files.append(f"{png_file}: OCR file not found at {ocr_file}")
-                        continue
-                else:
-                    prompt = prompt_llm
-                
-                # Call appropriate LLM
-                result_text = ""
-                if model_name == "gpt-4o" and openai_client:
-                    # Encode image
-                    with open(png_file, "rb") as image_file:
-                        base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-                    
-                    response = openai_client.chat.completions.create(
-                        model='gpt-4o',
-                        messages=[{
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": prompt},
-                                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64_image}"}}
-                            ]
-                        }]
-                    )
-                    result_text = response.choices[0].message.content or ""
-                    
-                elif model_name == "gemini-2.5-flash" and gemini_client:
-                    uploaded_file = gemini_client.files.upload(file=str(png_file))
-                    if uploaded_file:
-                        response = gemini_client.models.generate_content(
-                            model='gemini-2.5-flash',
-                            contents=[prompt, uploaded_file]
-                        )
-                        result_text = response.text or ""
-                    else:
-                        failed_files.append(f"{png_file}: Failed to upload to Gemini")
-                        continue
-                
-                # Save result
-                output_file = output_dir / f"{png_file.stem}.txt"
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(result_text)
-                
-                processed_files.append(str(output_file))
-                
-            except Exception as e:
-                failed_files.append(f"{png_file}: {str(e)}")
+        async def process_one(png_file: Path) -> str | None:
+            output_file = output_dir / f"{png_file.stem}.txt"
+            ocr_file = base_dir / "results" / "ocr-img2txt" / f"{png_file.stem}.txt"
+            
+            # Skip images whose result is newer than the image (and than its OCR input, if used)
+            if not force and await asyncio.to_thread(_is_up_to_date, str(png_file), str(output_file)) and (
+                    not use_ocr or await asyncio.to_thread(_is_up_to_date, str(ocr_file), str(output_file))):
+                skipped_files.append(str(output_file))
+                return None
+            
+            # Prepare prompt
+            if use_ocr:
+                # Read OCR output
+                if not ocr_file.exists():
+                    raise FileNotFoundError(f"OCR file not found at {ocr_file}")
+                ocr_text = await asyncio.to_thread(ocr_file.read_text, encoding='utf-8')
+                prompt = OCR_CORRECTION_PROMPT.format(input=ocr_text)
+            else:
+                prompt = LLM_TRANSCRIPTION_PROMPT
+            
+            # Reuse a cached response for an identical request (unless forced to re-sample),
+            # otherwise call the appropriate LLM
+            mtime_ns = (await asyncio.to_thread(png_file.stat)).st_mtime_ns
+            cache_key = await asyncio.to_thread(_llm_cache_key, model_name, prompt, str(png_file))
+            result_text = None
+            if use_cache and not force:
+                result_text = await asyncio.to_thread(_get_cached_response, cache_key)
+            if result_text is not None:
+                cached_files.append(str(png_file))
+            else:
+                result_text = await _call_llm_with_retries(model_name, prompt, png_file, mtime_ns,
+                                                          semaphore, limiter)
+                await asyncio.to_thread(_store_cached_response, cache_key, result_text)
+            
+            # Save result
+            await asyncio.to_thread(_write_text, str(output_file), result_text)
+            return str(output_file)
+        
+        results = await asyncio.gather(*(process_one(png_file) for png_file in png_files),
+                                       return_exceptions=True)
+        for png_file, result in zip(png_files, results):
+            if isinstance(result, Exception):
+                failed_files.append(f"{png_file}: {str(result)}")
+            elif result is not None:
+                processed_files.append(result)
         
         summary = f"LLM processing completed with {model_name}!\n"
         summary += f"Mode: {'OCR + LLM correction' if use_ocr else 'Direct LLM transcription'}\n"
         summary += f"Successfully processed: {len(processed_files)} files\n"
+        if cached_files:
+            summary += f"Served from cache: {len(cached_files)} files\n"
+        if skipped_files:
+            summary += f"Skipped (already up to date): {len(skipped_files)} files\n"
         summary += f"Output directory: {output_dir}\n"
         if failed_files:
             summary += f"Failed to process: {len(failed_files)} files\n"
@@ -529,13 +880,17 @@ Return the text only, nothing else.
         return f"Error during LLM processing: {str(e)}"
 
 @mcp.tool()
-def run_full_pipeline(image_folder: str, models: str = "gpt-4o,gemini-2.5-flash") -> str:
+async def run_full_pipeline(image_folder: str, models: str = "gpt-4o,gemini-2.5-flash", force: bool = False,
+                            use_cache: bool = True) -> str:
     """
     Run the complete OCR-mLLM pipeline on all images.
     
     Args:
         image_folder: Path to folder containing PNG images
         models: Comma-separated list of models to use (default: "gpt-4o,gemini-2.5-flash")
+        force: Re-run every stage even for images whose outputs are already up to date,
+            sending every LLM request again instead of reusing cached responses
+        use_cache: Reuse saved LLM responses for identical model/prompt/image requests
         
     Returns:
         Summary of complete pipeline execution
@@ -543,19 +898,37 @@ def run_full_pipeline(image_folder: str, models: str = "gpt-4o,gemini-2.5-flash"
     try:
         model_list = [m.strip() for m in models.split(",")]
         
-        # Step 1: Run Tesseract OCR
-        ocr_result = run_tesseract_pipeline(image_folder)
+        source_dir = Path(image_folder)
+        if not source_dir.exists():
+            return f"Error: Image folder not found at {image_folder}"
+        
+        # Scan the image folder once and share the list with every pass
+        png_files = _list_png_files(source_dir)
         
-        results = [f"=== TESSERACT OCR ===", ocr_result, ""]
+        # Both passes for a model run at once, so they share its request slots and rate limit
+        limits = {model: {"semaphore": asyncio.Semaphore(LLM_CONCURRENCY), "limiter": _RateLimiter(LLM_DEFAULT_RPS)}
+                  for model in model_list}
+        
+        # Tesseract OCR followed by OCR + LLM correction for each model
+        async def ocr_then_correct() -> tuple[str, list[str]]:
+            ocr_result = await run_tesseract_pipeline(image_folder, png_files=png_files, force=force)
+            ocr_llm_results = await asyncio.gather(
+                *(_process_with_llm(image_folder, model, use_ocr=True, use_cache=use_cache, png_files=png_files,
+                                    force=force, **limits[model])
+                  for model in model_list))
+            return ocr_result, ocr_llm_results
         
-        # Step 2: Run LLM processing for each model
-        for model in model_list:
-            # Direct LLM transcription
-            llm_result = process_with_llm(image_folder, model, use_ocr=False)
+        # Direct LLM transcription needs no OCR, so it runs while Tesseract is busy
+        (ocr_result, ocr_llm_results), llm_results = await asyncio.gather(
+            ocr_then_correct(),
+            asyncio.gather(*(_process_with_llm(image_folder, model, use_ocr=False, use_cache=use_cache,
+                                               png_files=png_files, force=force, **limits[model])
+                             for model in model_list))
+        )
+        
+        results = [f"=== TESSERACT OCR ===", ocr_result, ""]
+        for model, llm_result, ocr_llm_result in zip(model_list, llm_results, ocr_llm_results):
             results.extend([f"=== {model.upper()} DIRECT ===", llm_result, ""])
-            
-            # OCR + LLM correction
-            ocr_llm_result = process_with_llm(image_folder, model, use_ocr=True)
             results.extend([f"=== {model.upper()} + OCR CORRECTION ===", ocr_llm_result, ""])
         
         return "\n".join(results)
@@ -581,25 +954,22 @@ def get_pipeline_status(base_dir: str = ".") -> str:
         status += "=" * 40 + "\n"
         
         # Check input images
-        images_dir = root_dir / "data" / "pngs"
-        if images_dir.exists():
-            png_count = len(list(images_dir.glob("*.png")))
+        png_count = _count_files(root_dir / "data" / "pngs", ".png")
+        if png_count is not None:
             status += f"Input images: {png_count} PNG files\n"
         else:
             status += "Input images: Directory not found\n"
         
         # Check ground truth
-        gt_dir = root_dir / "data" / "ground-truth" / "txt"
-        if gt_dir.exists():
-            gt_count = len(list(gt_dir.glob("*.txt")))
+        gt_count = _count_files(root_dir / "data" / "ground-truth" / "txt", ".txt")
+        if gt_count is not None:
             status += f"Ground truth files: {gt_count} TXT files\n"
         else:
             status += "Ground truth files: Directory not found\n"
         
         # Check OCR results
-        ocr_dir = root_dir / "results" / "ocr-img2txt"
-        if ocr_dir.exists():
-            ocr_count = len(list(ocr_dir.glob("*.txt")))
+        ocr_count = _count_files(root_dir / "results" / "ocr-img2txt", ".txt")
+        if ocr_count is not None:
             status += f"OCR results: {ocr_count} files\n"
         else:
             status += "OCR results: Directory not found\n"
@@ -614,10 +984,11 @@ def get_pipeline_status(base_dir: str = ".") -> str:
             llm_base_dir = root_dir / "results" / dir_name
             if llm_base_dir.exists():
                 status += f"\n{display_name} results:\n"
-                for model_dir in llm_base_dir.iterdir():
-                    if model_dir.is_dir():
-                        count = len(list(model_dir.glob("*.txt")))
-                        status += f"  {model_dir.name}: {count} files\n"
+                with os.scandir(llm_base_dir) as model_dirs:
+                    for model_dir in model_dirs:
+                        if model_dir.is_dir():
+                            count = _count_files(model_dir.path, ".txt")
+                            status += f"  {model_dir.name}: {count} files\n"
             else:
                 status += f"{display_name} results: Directory not found\n"
         
@@ -664,13 +1035,10 @@ def compare_results(base_dir: str = ".", file_name: str | None = None) -> str:
             for method, dir_path in result_dirs.items():
                 file_path = dir_path / f"{file_name}.txt"
                 if file_path.exists():
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    word_count = len(content.split())
-                    char_count = len(content)
+                    preview, word_count, char_count = _text_stats(file_path)
                     comparison += f"{method}:\n"
                     comparison += f"  Words: {word_count}, Characters: {char_count}\n"
-                    comparison += f"  Preview: {content[:100]}...\n\n"
+                    comparison += f"  Preview: {preview}...\n\n"
                 else:
                     comparison += f"{method}: File not found\n\n"
         else:
@@ -679,8 +1047,8 @@ def compare_results(base_dir: str = ".", file_name: str | None = None) -> str:
             comparison += "=" * 30 + "\n"
             
             for method, dir_path in result_dirs.items():
-                if dir_path.exists():
-                    file_count = len(list(dir_path.glob("*.txt")))
+                file_count = _count_files(dir_path, ".txt")
+                if file_count is not None:
                     comparison += f"{method}: {file_count} files\n"
                 else:
                     comparison += f"{method}: Directory not found\n"